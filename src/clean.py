@@ -146,7 +146,9 @@ def combine_gait_data(*dataframes):
     data = pd.concat(dataframe_list).reset_index(drop = True)
     data["PD"] = data["PD"].fillna(0)
     data["MS"] = data["MS"].fillna(0)
-    data = data[(data != "#ERROR").all(axis = 1)]
+    ## failed featurizations are annotated "#ERROR", records without a file have NaN features ##
+    feature_cols = [feat for feat in data.columns if "." in feat]
+    data = data[(data != "#ERROR").all(axis = 1) & data[feature_cols].notnull().all(axis = 1)]
     data["is_control"] = data.apply(lambda x: 1 if (x["PD"] == 0 and x["MS"] ==0) else 0, axis = 1)
     data["class"] = data.apply(lambda x: annotate_classes(x["PD"], x["MS"], x["version"]), axis = 1)
     data[[_ for _ in data.columns if "." in _]] = data[[_ for _ in data.columns if "." in _]].apply(pd.to_numeric)
@@ -8,11 +8,11 @@ import warnings
 import utils.query_utils as query
 import utils.gait_feature_prototype_utils as gproc
 import synapseclient as sc
-from sklearn import metrics
 import time
+from functools import partial
 warnings.simplefilter("ignore")
 
-def clean_gait_mpower_dataset(data, filepath_colname, test_type):
+def clean_gait_mpower_dataset(data, filepath_colname, test_type, version):
     metadata = ["appVersion", "phoneInfo", "healthCode", "recordId", "createdOn"]
     data = data[[feature for feature in data.columns if \
                             (filepath_colname in feature) or \
@@ -20,6 +20,7 @@ def clean_gait_mpower_dataset(data, filepath_colname, test_type):
                             .rename({filepath_colname: "gait.json_pathfile"}, 
                                        axis = 1)
     data["test_type"] = test_type
+    data["version"] = version
     return data
 
 
@@ -45,25 +46,25 @@ def main():
     
     data_outbound_v1 = clean_gait_mpower_dataset(query_data_v1, 
                                                 "deviceMotion_walking_outbound.json.items_pathfile",
-                                                "walking")
+                                                "walking", "MPOWER_V1")
     
 
     data_return_v1 = clean_gait_mpower_dataset(query_data_v1, 
                                                 "deviceMotion_walking_return.json.items_pathfile",
-                                                "walking")
+                                                "walking", "MPOWER_V1")
 
     data_balance_v1 = clean_gait_mpower_dataset(query_data_v1, 
                                                 "deviceMotion_walking_rest.json.items_pathfile",
-                                                "balance")
+                                                "balance", "MPOWER_V1")
 
     data_walking_v2 = clean_gait_mpower_dataset(query_data_v2, 
                                                 "walk_motion.json_pathfile",
-                                                "walking")
+                                                "walking", "MPOWER_V2")
 
 
     data_balance_v2 = clean_gait_mpower_dataset(query_data_v2, 
                                                 "balance_motion.json_pathfile",
-                                                "balance")
+                                                "balance", "MPOWER_V2")
 
     data = pd.concat([data_outbound_v1, 
                   data_return_v1, 
@@ -92,7 +93,11 @@ def main():
     
     
     ## create pdkit ##
-    walk_data = query.parallel_func_apply(data, gproc.walk_featurize_wrapper, 16, 250)
+    ## featurize each table version with its own json parser ##
+    walk_data = pd.concat([query.parallel_func_apply(version_data, 
+                                                    partial(gproc.walk_featurize_wrapper, version = version), 
+                                                    16, 250) \
+                            for version, version_data in data.groupby("version")])
     walk_data = walk_data[walk_data["gait.walk_features"] != "#ERROR"]
     walk_data = query.normalize_list_dicts_to_dataframe_rows(walk_data, ["gait.walk_features"])
     metadata_feature = ['recordId', 'healthCode','appVersion', 'phoneInfo', 'createdOn', 'test_type']
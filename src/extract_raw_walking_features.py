@@ -15,6 +15,7 @@ import time
 import multiprocessing as mp
 import warnings
 import argparse
+from functools import partial
 import utils.query_utils as query
 import utils.pdkit_feature_utils as pdkit_utils
 import utils.sfm_feature_utils as sfm_utils
@@ -53,10 +54,55 @@ def read_args():
                         help = "Featurization choices: 'pdkit', 'sfm'")
     parser.add_argument("--update", action = "store_true",
                         help = "If specified, will update data based on new recordIds, otherwise start fresh")
+    parser.add_argument("--force", action = "store_true",
+                        help = "If specified, will featurize again instead of reading the local parquet cache")
     args = parser.parse_args()
     return args
 
 
+def featurize_data(data, featurize, version, num_cores, num_chunks):
+    """
+    Function to featurize the queried walking data with the choice of feature computation
+    parameter:
+        `data`       : queried walking table (pd.DataFrame)
+        `featurize`  : featurization choice ('pdkit', 'sfm')
+        `version`    : table version of the queried data (key of query.SENSOR_DATA_PARSERS)
+        `num_cores`  : number of cores to parallelize with
+        `num_chunks` : number of sample per partition
+    returns featurized dataframe without the filepath and has_file columns
+    """
+    if featurize == "sfm":
+        print("processing spectral-flatness")
+        data = query.parallel_func_apply(data, partial(sfm_utils.sfm_featurize, version = version), 
+                                            int(num_cores), int(num_chunks))
+    elif featurize == "pdkit":
+        print("processing pdkit")
+        data = query.parallel_func_apply(data, partial(pdkit_utils.pdkit_featurize, version = version), 
+                                            int(num_cores), int(num_chunks))
+        data = pdkit_utils.normalize_pdkit_features(data)
+    print("parallelization process finished")
+    keep = ~(data.columns.str.contains("path", regex = False) | data.columns.str.contains("0", regex = False) \
+                | (data.columns == "has_file"))
+    return data.loc[:, keep].reset_index(drop = True)
+
+
+def cache_data(data, cache_path):
+    """
+    Function to store the complete featurized data as the local parquet cache,
+    "#ERROR" annotations are cached as NaN (clean.py drops both)
+    parameter:
+        `data`       : featurized dataframe of every recordId of the output file
+        `cache_path` : path of the parquet cache
+    """
+    ## columns mixing "#ERROR" strings and numbers cannot be stored as parquet ##
+    data = data.replace("#ERROR", np.nan)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok = True)
+        data.to_parquet(cache_path)
+    except (ValueError, TypeError, NotImplementedError, ImportError) as error:
+        print("featurized data is not cached: %s" % error)
+
+
 def main():
     """
     Main function
@@ -78,31 +124,44 @@ def main():
         source_table_id = WALK_TABLE_PASSIVE
     elif args.version == "MS_ACTIVE":
         source_table_id = ELEVATE_MS_ACTIVE
-    data = query.get_walking_synapse_table(syn = syn, 
-                                    table_id = source_table_id, 
-                                    version = args.version, 
-                                    healthCodes = query.get_all_healthcodes_from_synTable(syn = syn, table_id = source_table_id))
     prev_stored_data   = pd.DataFrame()
     if args.update:
         print("\n#########  UPDATING DATA  ################\n")
         prev_stored_data = query.check_children(syn = syn,
                                         data_parent_id = RAW_DATA_PARENT_ID, 
                                         filename = args.filename)
-        data = data[~data["recordId"].isin(prev_stored_data["recordId"].unique())]
+    
+    ## featurized data is cached locally, the cache always holds every recordId of the output file ##
+    cache_path = os.path.join(".cache", "%s_%s_%s.parquet" % (args.version, args.featurize, args.filename))
+    cached_data = pd.DataFrame()
+    if os.path.exists(cache_path) and not args.force:
+        print("reading featurized data from %s" % cache_path)
+        cached_data = pd.read_parquet(cache_path)
+    
+    if cached_data.empty or args.update:
+        data = query.get_walking_synapse_table(syn = syn, 
+                                        table_id = source_table_id, 
+                                        version = args.version, 
+                                        healthCodes = query.get_all_healthcodes_from_synTable(syn = syn, table_id = source_table_id))
+        
+        ## only featurize recordIds that are neither stored on synapse nor in the local cache ##
+        processed_data = pd.concat([prev_stored_data, cached_data])
+        if "recordId" in processed_data.columns:
+            data = data[~data["recordId"].isin(processed_data["recordId"].unique())]
         print(data.shape)
-    if args.featurize == "sfm":
-        print("processing spectral-flatness")
-        data = query.parallel_func_apply(data, sfm_utils.sfm_featurize, 
-                                            int(args.num_cores), int(args.num_chunks))
-    elif args.featurize == "pdkit":
-        print("processing pdkit")
-        data = query.parallel_func_apply(data, pdkit_utils.pdkit_featurize, 
-                                            int(args.num_cores), int(args.num_chunks))
-        data = pdkit_utils.normalize_pdkit_features(data)
-    print("parallelization process finished")
-    data = data[[feat for feat in data.columns if ("path" not in feat) and ("0" not in feat)]].reset_index(drop = True)
-    data = pd.concat([prev_stored_data, data]).reset_index(drop = True)
-    data = data.loc[:,~data.columns.duplicated()]
+        if data.shape[0] > 0:
+            data = featurize_data(data, args.featurize, args.version, args.num_cores, args.num_chunks)
+        else:
+            data = pd.DataFrame()
+        
+        ## cached recordIds that are not on synapse yet are uploaded along with the new ones ##
+        if args.update and "recordId" in prev_stored_data.columns and not cached_data.empty:
+            cached_data = cached_data[~cached_data["recordId"].isin(prev_stored_data["recordId"].unique())]
+        data = pd.concat([prev_stored_data, cached_data, data]).reset_index(drop = True)
+        data = data.loc[:,~data.columns.duplicated()]
+        cache_data(data, cache_path)
+    else:
+        data = cached_data
     query.save_data_to_synapse(syn = syn, 
                             data = data, 
                             output_filename = args.filename, 
@@ -10,17 +10,13 @@ import utils.query_utils as query
 import utils.new_gait_feature_utils as gproc
 from scipy import signal
 import warnings
-from scipy.fftpack import (rfft, fftfreq)
 from scipy.signal import (butter, lfilter, correlate, freqz)
-from sklearn import metrics
 from operator import itemgetter
 import time
 from itertools import *
-from sklearn import metrics
 import time
 
 from scipy import interpolate, signal, fft
-from scipy.fftpack import rfft
 from pywt import wavedec
 
 from pdkit.utils import (load_data,
@@ -90,16 +86,8 @@ def subset_data_non_zero_runs(data, zero_runs_cutoff):
     
     returns a subset of non-zero runs pd.DataFrame
     """
-    z_runs_threshold = []
-    for value in zero_runs(data["steps"]):
-        # if not moving by this duration (5 seconds)
-        if (value[1]-value[0]) >= zero_runs_cutoff:
-            z_runs_threshold.append(value)
-    z_runs_threshold = np.array(z_runs_threshold)
-    for i in z_runs_threshold:
-        print(i)
-        data = data.loc[~data.index.isin(range(i[0],i[1]))]
-    return data.reset_index(drop = True)
+    mask = gproc.non_zero_runs_mask(data["steps"].values, zero_runs_cutoff)
+    return data[mask].reset_index(drop = True)
 
 def zero_runs(array):
     """
@@ -172,7 +160,8 @@ def compute_rotational_features(accel_data, rotation_data):
             turn_duration = rotation_data["td"].iloc[i+1] - rotation_data["td"].iloc[start]
             start  = i + 1
             if (len(y_rot) >= 2):
-                auc   = np.abs(metrics.auc(x_rot,y_rot)) 
+                ## td is sorted, plain trapezoidal rule without sklearn's monotonicity check
+                auc   = np.abs(np.trapz(y_rot.values, x_rot.values))
                 aucXt = auc * turn_duration
                 omega = auc / turn_duration
                 if aucXt > 2:
@@ -463,7 +452,8 @@ def calculate_freeze_index(data):
     f_nr_FBe = int(freeze_band[1] / f_res)
     data = data.values - np.mean(data.values)
     
-    Y = np.fft.fft(data, int(window_size))
+    ## both bands sit well below the nyquist bin, so the one-sided spectrum is enough
+    Y = fft.rfft(data, int(window_size))
     Pyy = abs(Y*Y) / window_size
     areaLocoBand = numerical_integration( Pyy[f_nr_LBs-1 : f_nr_LBe], sampling_frequency)
     areaFreezeBand = numerical_integration( Pyy[f_nr_FBs-1 : f_nr_FBe], sampling_frequency)
@@ -476,7 +466,7 @@ def calculate_freeze_index(data):
 
 
 
-def walk_feature_pipeline(filepath):
+def walk_feature_pipeline(filepath, version = None):
     """
     Function of data pipeline for subsetting data from rotational movements, retrieving rotational features, 
     removing low-variance longitudinal data and PDKIT estimation of heel strikes based on 2.5 secs window chunks
@@ -484,14 +474,17 @@ def walk_feature_pipeline(filepath):
     
         `filepath`    : string of filepath to /.synapseCache (type = str)
         `orientation` : orientation of featurized data (type = str)
+        `version`     : table version of the file, detected from the json layout if not given (type = str)
     
     returns: 
         gait feature as a series in the dataframe
     """    
     accel_ts    = query.get_sensor_ts_from_filepath(filepath = filepath, 
-                                        sensor = "userAcceleration")
+                                        sensor = "userAcceleration",
+                                        version = version)
     rotation_ts = query.get_sensor_ts_from_filepath(filepath = filepath, 
-                                        sensor = "rotationRate")
+                                        sensor = "rotationRate",
+                                        version = version)
     # return errors # 
     if not isinstance(accel_ts, pd.DataFrame):
         return "#ERROR"
@@ -505,9 +498,9 @@ def walk_feature_pipeline(filepath):
     return [j for i in gait_feature_arr for j in i]
 
 
-def rotation_feature_pipeline(filepath):
-    rotation_ts = query.get_sensor_ts_from_filepath(filepath, "rotationRate")
-    accel_ts = query.get_sensor_ts_from_filepath(filepath, "userAcceleration")                                  
+def rotation_feature_pipeline(filepath, version = None):
+    rotation_ts = query.get_sensor_ts_from_filepath(filepath, "rotationRate", version)
+    accel_ts = query.get_sensor_ts_from_filepath(filepath, "userAcceleration", version)                                  
     if not isinstance(rotation_ts, pd.DataFrame):
         return "#ERROR"
     rotation_ts = compute_rotational_features(accel_ts, rotation_ts)
@@ -531,24 +524,26 @@ def annotate_consecutive_zeros(data, feature):
     data['consec_zero_steps_count'] = np.where(data[feature].eq(0), counts, 0)
     return data
 
-def walk_featurize_wrapper(data):
+def walk_featurize_wrapper(data, version = None):
     """
     wrapper function for walking multiprocessing jobs
     parameter:
-        `data`: takes in pd.DataFrame
+        `data`    : takes in pd.DataFrame
+        `version` : table version of the filepaths, detected from the json layout if not given
     returns a json file featurized walking data
     """
-    data["gait.walk_features"] = data["gait.json_pathfile"].apply(walk_feature_pipeline)
+    data["gait.walk_features"] = data["gait.json_pathfile"].apply(walk_feature_pipeline, version = version)
     return data
 
-def rotation_featurize_wrapper(data):
+def rotation_featurize_wrapper(data, version = None):
     """
     wrapper function for rotation multiprocessing jobs
     parameter:
-        `data`: takes in pd.DataFrame
+        `data`    : takes in pd.DataFrame
+        `version` : table version of the filepaths, detected from the json layout if not given
     returns a json file featurized rotation data
     """
-    data["gait.rotation_features"] = data["gait.json_pathfile"].apply(rotation_feature_pipeline)
+    data["gait.rotation_features"] = data["gait.json_pathfile"].apply(rotation_feature_pipeline, version = version)
     return data
 
 
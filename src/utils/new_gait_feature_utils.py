@@ -1,22 +1,25 @@
 ## package imports ##
 import sys
+import os
 import pdkit
 import utils.query_utils as query
 import synapseclient as sc
-import matplotlib.pyplot as plt
-from scipy import signal
+from scipy import (signal, fft)
 import warnings
-from scipy.fftpack import (rfft, fftfreq)
-from scipy.signal import (butter, lfilter, correlate, freqz)
+from scipy.signal import (butter, sosfilt, sosfiltfilt, correlate, sosfreqz)
 import pandas as pd
-import seaborn as sns
 import numpy as np
-from sklearn import metrics
-from operator import itemgetter
 import time
-from itertools import *
+from functools import lru_cache
+from joblib import Memory
 warnings.simplefilter("ignore")
 
+## disk cache of featurized files, reruns skip recordings that are already processed ##
+## joblib only tracks the source of cached_gait_processor_pipeline itself, so bump
+## PIPELINE_VERSION (or call memory.clear()) after changing gait_processor_pipeline or its helpers ##
+memory = Memory(os.path.join(".cache", "pipeline"), verbose = 0)
+PIPELINE_VERSION = 1
+
 
 """
 TODO:
@@ -25,6 +28,19 @@ consolidate low pass filters parameter into classes
 
 
 ## helper functions ##
+@lru_cache(maxsize = 32)
+def butter_lowpass_coefficients(order, normal_cutoff):
+    """
+    Function to design the low-pass Butterworth filter once per (order, cutoff),
+    the sample rate, cutoff and order used in this module are fixed constants
+    parameter:
+        `order`         : filter order
+        `normal_cutoff` : cutoff frequency normalized by the nyquist frequency
+    returns the filter as second-order sections (numerically stable for higher orders)
+    """
+    return butter(order, normal_cutoff, btype='low', analog=False, output='sos')
+
+
 def butter_lowpass_filter(data, sample_rate, cutoff=10, order=4, plot=False):
     """
         `Low-pass filter <http://stackoverflow.com/questions/25191620/
@@ -50,10 +66,12 @@ def butter_lowpass_filter(data, sample_rate, cutoff=10, order=4, plot=False):
     """
     nyquist = 0.5 * sample_rate
     normal_cutoff = cutoff / nyquist
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
+    sos = butter_lowpass_coefficients(order, normal_cutoff)
 
     if plot:
-        w, h = freqz(b, a, worN=8000)
+        ## imported here so workers that never plot skip the matplotlib import
+        import matplotlib.pyplot as plt
+        w, h = sosfreqz(sos, worN=8000)
         plt.subplot(2, 1, 1)
         plt.plot(0.5*sample_rate*w/np.pi, np.abs(h), 'b')
         plt.plot(cutoff, 0.5*np.sqrt(2), 'ko')
@@ -63,7 +81,11 @@ def butter_lowpass_filter(data, sample_rate, cutoff=10, order=4, plot=False):
         plt.xlabel('Frequency [Hz]')
         plt.grid()
         plt.show()
-    y = lfilter(b, a, data)
+    if len(data) == 0:
+        return np.zeros(0)
+    ## forward-backward pass for zero lag, shorten the edge padding on very short signals
+    padlen = min(3 * (2 * len(sos) + 1), len(data) - 1)
+    y = sosfiltfilt(sos, data, padlen = padlen)
     return y
 
 
@@ -76,10 +98,9 @@ def zero_runs(array):
     format of returned data: np.array([start index of zero occurence, end index of zero occurence], ...) 
     """
     # Create an array that is 1 where a is 0, and pad each end with an extra 0.
-    iszero = np.concatenate(([0], np.equal(array, 0).view(np.int8), [0]))
-    absdiff = np.abs(np.diff(iszero))
-    # Runs start and end where absdiff is 1.
-    ranges = np.where(absdiff == 1)[0].reshape(-1, 2)
+    iszero = np.concatenate(([0], np.equal(np.asarray(array), 0).view(np.int8), [0]))
+    # Runs start and end where the padded indicator changes value.
+    ranges = np.flatnonzero(np.diff(iszero)).reshape(-1, 2)
     return ranges
 
 def detect_zero_crossing(array):
@@ -89,9 +110,26 @@ def detect_zero_crossing(array):
         `array`: numpy array
     returns index location before sign change 
     """
-    zero_crossings = np.where(np.diff(np.sign(array)))[0]
+    sign = np.sign(np.asarray(array))
+    zero_crossings = np.flatnonzero(sign[1:] != sign[:-1])
     return zero_crossings
 
+def non_zero_runs_mask(array, zero_runs_cutoff):
+    """
+    Function to build a boolean keep-mask that drops zero runs
+    with a length of at least the cutoff threshold
+    parameter:
+        `array`            : np array
+        `zero_runs_cutoff` : threshold of how many consecutive zeros will be masked out
+    returns boolean np array, False on every element of a long zero run
+    """
+    mask = np.ones(len(array), dtype = bool)
+    for start, end in zero_runs(array):
+        # if not moving by this duration (5 seconds)
+        if (end - start) >= zero_runs_cutoff:
+            mask[start:end] = False
+    return mask
+
 def subset_data_non_zero_runs(data, zero_runs_cutoff):
     """
     Function to subset data from zero runs heel strikes 
@@ -101,66 +139,168 @@ def subset_data_non_zero_runs(data, zero_runs_cutoff):
         `zero_runs_cutoff` : threshold of how many consecutive row of zeros that will be remove from the dataframe
     returns a subset of non-zero runs pd.DataFrame
     """
-    z_runs_threshold = []
-    for value in zero_runs(data["heel_strikes"]):
-        # if not moving by this duration (5 seconds)
-        if (value[1]-value[0]) >= zero_runs_cutoff:
-            z_runs_threshold.append(value)
-    z_runs_threshold = np.array(z_runs_threshold)
-    for i in z_runs_threshold:
-        data = data.loc[~data.index.isin(range(i[0],i[1]))]
-    return data.reset_index(drop = True)
+    mask = non_zero_runs_mask(data["heel_strikes"].values, zero_runs_cutoff)
+    return data[mask].reset_index(drop = True)
+
+
+def estimate_interpeak_decel(data, sample_rate):
+    """
+    Function mirroring pdkit compute_interpeak on a stack of demeaned signals,
+    the real FFT of every row is computed in one call
+    parameter:
+        `data`        : N x signal_length np array of demeaned signals
+        `sample_rate` : sampling frequency of the signal
+    returns (dominant frequency, half of the inter-peak samples) np arrays per row
+    """
+    signal_length = data.shape[1]
+    ## pdkit argsorts the fftpack-packed real spectrum [Re0, Re1, Im1, Re2, Im2, ...]
+    spectrum = fft.rfft(data, axis = 1, workers = -1)
+    packed = np.empty_like(data)
+    packed[:, 0] = spectrum[:, 0].real
+    packed[:, 1::2] = spectrum[:, 1:(signal_length // 2) + 1].real
+    packed[:, 2::2] = spectrum[:, 1:(signal_length + 1) // 2].imag
+    imax_freq = np.argsort(packed, axis = 1)[:, -2]
+    freq = np.abs(fft.fftfreq(signal_length, d = 1.0 / sample_rate)[imax_freq])
+    with np.errstate(divide = "ignore"):
+        decel = np.round(sample_rate / freq) / 2
+    return freq, decel
+
+
+def count_heel_strikes(filtered, freq, decel, delta = 0.5):
+    """
+    Function counting heel strikes on one demeaned, low-pass filtered signal
+    the same way as pdkit GaitProcessor.heel_strikes
+    parameter:
+        `filtered` : demeaned low-pass filtered signal (np array)
+        `freq`     : dominant frequency from estimate_interpeak_decel
+        `decel`    : half of the inter-peak samples from estimate_interpeak_decel
+        `delta`    : peak threshold relative to the filtered maximum, as GaitProcessor delta
+    returns number of heel strikes, zero where pdkit would have raised
+            (no strikes, or strikes too close to the signal start)
+    """
+    ## interpeak at zero frequency is infinite, pdkit fails to convert it to int
+    if freq == 0:
+        return 0
+    positive = filtered > 0
+    transitions = np.flatnonzero(positive[:-1] & ~positive[1:])
+    if len(transitions) < 2:
+        return 0
+    ## strongest filtered peak between consecutive positive-to-negative crossings
+    segment_max = np.maximum.reduceat(filtered[:transitions[-1]], transitions[:-1])
+    is_strike = segment_max > np.abs(delta * filtered.max())
+    if not is_strike.any():
+        return 0
+    ## pdkit searches the raw peak in data[strike - decel: strike + decel],
+    ## that slice is empty (and raises) when decel is zero or reaches before the signal start
+    first_segment = np.flatnonzero(is_strike)[0]
+    first_strike = transitions[first_segment] + \
+                    np.argmax(filtered[transitions[first_segment]:transitions[first_segment + 1]])
+    if int(decel) == 0 or first_strike < int(decel):
+        return 0
+    return is_strike.sum()
+
+
+def batched_heel_strikes(windows, sample_rate, cutoff = 5, order = 4, delta = 0.5, filtered = None):
+    """
+    Function mirroring pdkit GaitProcessor.heel_strikes on a stack of equally sized windows,
+    demeaning, low-pass filtering and the interpeak FFT run on all windows at once
+    parameter:
+        `windows`     : N x window_size np array of raw (unfiltered) signal windows
+        `sample_rate` : sampling frequency of the signal
+        `cutoff`      : low-pass filter cutoff, as GaitProcessor cutoff_frequency
+        `order`       : low-pass filter order, as GaitProcessor filter_order
+        `delta`       : peak threshold relative to the filtered maximum, as GaitProcessor delta
+        `filtered`    : N x window_size np array of the same windows already low-pass filtered,
+                        filtered causally per window (as pdkit) if not given
+    returns np array of number of heel strikes per window,
+            zero where pdkit would have raised (no strikes, or strikes too close to the window start)
+    """
+    n_windows, window_size = windows.shape
+    heel_strikes = np.zeros(n_windows, dtype = np.int32)
+    if n_windows == 0 or window_size < 2:
+        return heel_strikes
+    window_means = windows.mean(axis = 1, keepdims = True)
+    data = windows - window_means
+
+    if filtered is None:
+        ## pdkit filters each window causally (lfilter), same filter in second-order sections
+        sos = butter_lowpass_coefficients(order, cutoff / (0.5 * sample_rate))
+        filtered = sosfilt(sos, data, axis = 1)
+    else:
+        filtered = filtered - window_means
+
+    freq, decel = estimate_interpeak_decel(data, sample_rate)
+    for k in range(n_windows):
+        heel_strikes[k] = count_heel_strikes(filtered[k], freq[k], decel[k], delta)
+    return heel_strikes
+
+
+def heel_strikes_on_filtered(data, filtered, sample_rate, duration, delta = 0.5):
+    """
+    Function to calculate heel strikes per second of a whole walking sequence
+    from its already low-pass filtered signal, instead of letting pdkit filter and FFT it again
+    parameter:
+        `data`        : demeaned raw signal (np array)
+        `filtered`    : demeaned low-pass filtered signal (np array)
+        `sample_rate` : sampling frequency of the signal
+        `duration`    : duration of the sequence in seconds
+        `delta`       : peak threshold relative to the filtered maximum, as GaitProcessor delta
+    returns number of heel strikes per second
+    """
+    if len(data) < 2 or duration <= 0:
+        return 0
+    freq, decel = estimate_interpeak_decel(data[np.newaxis, :], sample_rate)
+    return count_heel_strikes(filtered, freq[0], decel[0], delta) / duration
 
 
-def calculate_number_of_steps_per_window(data, orientation):
+def calculate_number_of_steps_per_window(data, orientation, filtered = None):
     """
     A modified function to calculate number of steps per 2.5 seconds window chunk
     parameter: 
-        `filepath`    : time-series (filepath)
+        `data`        : time-series (pd.DataFrame), only read from
         `orientation` : coordinate orientation of the time series
+        `filtered`    : low-pass filtered (5Hz, 4th order) orientation signal,
+                        filtered here if not given
     
     returns number of steps per chunk based on each recordIds
     """
-    
-    ts = data.copy()
     window_size = 256
     step_size = 50
-    jPos = window_size + 1
-    i = 0
-    time = []
-    variances = []
-    
-    sample_rate = ts.shape[0]/ts["td"][-1]
-    ts["filtered_%s" %orientation] = butter_lowpass_filter(ts[orientation], 
-                                                            sample_rate = 100, 
-                                                            cutoff = 5, 
-                                                            order = 4)
-    time = []
-    heel_strikes = []
-    while jPos < len(ts):
-        jStart = jPos - window_size
-        time.append(jPos)
-        subset = ts.iloc[jStart:jPos]
-        gp = pdkit.GaitProcessor(duration = subset.td[-1] - subset.td[0],
-                                    cutoff_frequency = 5,
-                                    filter_order = 4,
-                                    delta = 0.5)
-        var = subset["filtered_%s" %orientation].var()
-        variances.append(var)
-        try:
-            if (var) < 1e-2:
-                heel_strikes.append(0)
-            else:
-                heel_strikes.append(len(gp.heel_strikes(subset[orientation])[1]))
-        except:
-            heel_strikes.append(0)
-        jPos = jPos + step_size
-        i = i + 1
-    
+
+    ## work on the numpy columns, a per-window summary dataframe is only built at the end
+    raw_arr = data[orientation].values
+    if filtered is None:
+        filtered_arr = butter_lowpass_filter(raw_arr,
+                                            sample_rate = 100,
+                                            cutoff = 5,
+                                            order = 4)
+    else:
+        filtered_arr = np.asarray(filtered)
+
+    ## windows start at sample 1 and never include the last sample (same as the previous jPos loop)
+    n_windows = max(0, (len(raw_arr) - 2 - window_size) // step_size + 1)
+    time = np.arange(n_windows) * step_size + window_size + 1
+    heel_strikes = np.zeros(n_windows, dtype = np.int32)
+    variances = np.zeros(n_windows)
+    if n_windows > 0:
+        raw_windows = np.lib.stride_tricks.sliding_window_view(
+                        raw_arr[1:-1], window_size)[::step_size]
+        filtered_windows = np.lib.stride_tricks.sliding_window_view(
+                        filtered_arr[1:-1], window_size)[::step_size]
+        variances = filtered_windows.var(axis = 1, ddof = 1)
+
+        ## low-variance windows are kept as zero heel strikes, only the active ones are processed,
+        ## counted on the same filtered signal as the sequence-level heel strikes
+        active_windows = np.flatnonzero(variances >= 1e-2)
+        heel_strikes[active_windows] = batched_heel_strikes(raw_windows[active_windows],
+                                                            sample_rate = 100,
+                                                            cutoff = 5,
+                                                            order = 4,
+                                                            delta = 0.5,
+                                                            filtered = filtered_windows[active_windows])
+
     ## on each time-window chunk collect data into numpy array
-    heel_strikes = np.array(heel_strikes)
-    variances = np.array(variances)
-    ts = pd.DataFrame({"time":time, 
+    ts = pd.DataFrame({"time":time,
                         "heel_strikes":heel_strikes/(256/100), 
                         "variance": variances})
     
@@ -205,16 +345,45 @@ def get_rotational_features(data, orientation):
 
 
 
+def backfill_array(array, fill_value = 0):
+    """
+    Function to backward fill NaN values of an array, 
+    trailing NaN without a next valid value are set to the fill value
+    parameter:
+        `array`     : np array
+        `fill_value`: value for the trailing NaN
+    
+    returns a backward filled np array
+    """
+    array = np.asarray(array, dtype = np.float64)
+    n = len(array)
+    ## index of the next valid value at or after each position, n if there is none
+    idx = np.where(~np.isnan(array), np.arange(n), n)
+    idx = np.minimum.accumulate(idx[::-1])[::-1]
+    return np.where(idx < n, array[np.clip(idx, 0, n - 1)], fill_value)
+
+
 def create_overlay_data(accel_data, rotation_data):
     """
-    Function to overlay acceleration data and rotational data
+    Function to overlay acceleration data and rotational data,
+    rotation rows are placed on the acceleration rows with the exact same td
+    (both are sorted by td, so this is a left join without the hash merge)
     """
-    test = pd.merge(accel_data, rotation_data, on = "td", how = "left")
+    test = accel_data.reset_index(drop = True)
+    accel_td = test["td"].values
+    rotation_td = rotation_data["td"].values
+    idx = np.searchsorted(accel_td, rotation_td)
+    matched = idx < len(accel_td)
+    matched[matched] = accel_td[idx[matched]] == rotation_td[matched]
+    for feature in [feat for feat in rotation_data.columns if feat not in test.columns]:
+        aligned = np.full(len(test), np.nan)
+        aligned[idx[matched]] = rotation_data[feature].values[matched]
+        test[feature] = aligned
     test["time"] = test["td"]
     test = test.set_index("time")
     test.index = pd.to_datetime(test.index, unit = "s")
-    test["aucXt"] = test["aucXt"].fillna(method = "bfill").fillna(0)
-    test["turn_duration"] = test["turn_duration"].fillna(method = "bfill").fillna(0)
+    test["aucXt"] = backfill_array(test["aucXt"].values)
+    test["turn_duration"] = backfill_array(test["turn_duration"].values)
     return test
 
 
@@ -224,13 +393,13 @@ def separate_array_sequence(array):
     parameter:
         `array`: np.array, or a list
     
-    returns a numpy array groupings of sequences
+    returns a list of numpy array groupings of sequences
     """
-    seq2 = array
-    groups = []
-    for _, g in groupby(enumerate(seq2), lambda x: x[0]-x[1]):
-        groups.append(list(map(itemgetter(1), g)))
-    groups = np.asarray(groups)
+    array = np.asarray(array)
+    if array.size == 0:
+        return []
+    ## split wherever two neighbouring values are not consecutive
+    groups = np.split(array, np.flatnonzero(np.diff(array) != 1) + 1)
     return groups
 
 
@@ -246,66 +415,76 @@ def calculate_rotation(data, orientation):
     
     returns dataframe of calculation of auc and aucXt
     """
-    start = 0
-    dict_list = {}
-    dict_list["td"] = []
-    dict_list["auc"] = []
-    dict_list["turn_duration"] = []
-    dict_list["aucXt"] = []
     data[orientation] = butter_lowpass_filter(data = data[orientation], 
                                                     sample_rate = 100, 
                                                     cutoff=2, 
                                                     order=2)
-    zcr_list = detect_zero_crossing(data[orientation].values)
-    list_rotation = []
-    turn_window = 0
-    for i in zcr_list: 
-        x = data["td"].iloc[start:i+1].values
-        y = data[orientation].iloc[start:i+1].values
-        turn_duration = data["td"].iloc[i+1] - data["td"].iloc[start]
-        start  = i + 1
-        if (len(y) >= 2):
-            auc   = np.abs(metrics.auc(x,y)) 
-            aucXt = auc * turn_duration
-            omega = auc / turn_duration
-            if aucXt > 2:
-                turn_window += 1
-                list_rotation.append({
-                    "turn_start": x[0],
-                    "turn_end":  x[-1],
-                    "turn_duration": turn_duration,
-                    "auc": auc, ## radian
-                    "omega": omega, ## radian/secs 
-                    "aucXt":aucXt, ## radian . secs (based on research paper)
-                    "turn_window": turn_window
-                })
-    if len(list_rotation) == 0:
-        return "#ERROR"
-    return list_rotation
+    td_arr = data["td"].values
+    rotation_arr = data[orientation].values
+    zcr_list = detect_zero_crossing(rotation_arr)
+    if len(zcr_list) == 0:
+        return pd.DataFrame(columns = ["td", "turn_start", "turn_duration", "auc", "omega", "aucXt"])
+    ## each segment runs from the sample after the previous zero crossing up to the next one
+    seg_starts = np.concatenate(([0], zcr_list[:-1] + 1))
+    ## trapezoid areas between neighbouring samples, dropping the ones that bridge two segments
+    ## so that a single reduceat sums the trapezoidal rule of every segment at once
+    trapezoids = np.diff(td_arr) * (rotation_arr[1:] + rotation_arr[:-1]) / 2.0
+    trapezoids[zcr_list] = 0
+    auc_arr = np.abs(np.add.reduceat(trapezoids[:zcr_list[-1] + 1], seg_starts))
+    turn_duration_arr = td_arr[zcr_list + 1] - td_arr[seg_starts]
+    ## segments need at least two samples for an area
+    keep = (zcr_list - seg_starts) >= 1
+    auc_arr = auc_arr[keep]
+    turn_duration_arr = turn_duration_arr[keep]
+    return pd.DataFrame({"td": td_arr[zcr_list[keep]], ## end of the segment
+                         "turn_start": td_arr[seg_starts[keep]],
+                         "turn_duration": turn_duration_arr,
+                         "auc": auc_arr, ## radian
+                         "omega": auc_arr / turn_duration_arr, ## radian/secs 
+                         "aucXt": auc_arr * turn_duration_arr}) ## radian . secs (based on research paper)
 
-def compute_rotational_features(filepath, orientation):
+def compute_rotational_features(filepath, orientation, version = None):
+    """
+    Function to retrieve every turn (aucXt above 2) of a rotation file
+    parameter:
+        `filepath`   : string of pathfile
+        `orientation`: orientation (string)
+        `version`    : table version of the file, detected from the json layout if not given
+    
+    returns a list of dictionary of each turn, or "#ERROR" if no turn is found
+    """
     rotation_ts = query.get_sensor_ts_from_filepath(filepath = filepath, 
-                                                    sensor = "rotationRate")
+                                                    sensor = "rotationRate",
+                                                    version = version)
     if not isinstance(rotation_ts, pd.DataFrame):
         return "#ERROR"
     rotation_ts = calculate_rotation(rotation_ts, "y")
-    return rotation_ts
+    rotation_ts = rotation_ts[rotation_ts["aucXt"] > 2].rename(columns = {"td": "turn_end"})
+    if rotation_ts.shape[0] == 0:
+        return "#ERROR"
+    rotation_ts["turn_window"] = np.arange(1, rotation_ts.shape[0] + 1)
+    rotation_ts = rotation_ts[["turn_start", "turn_end", "turn_duration", 
+                               "auc", "omega", "aucXt", "turn_window"]]
+    return rotation_ts.to_dict("records")
 
 
-def gait_processor_pipeline(filepath, orientation):
+def gait_processor_pipeline(filepath, orientation, version = None):
     """
     Function of data pipeline for subsetting data from rotational movements, retrieving rotational features, 
     removing low-variance longitudinal data and PDKIT estimation of heel strikes based on 2.5 secs window chunks
     parameters:
         `data`       : string of pathfile, or pandas dataframe
         `orientation`: orientation of featurized data
+        `version`    : table version of the file, detected from the json layout if not given
     
     returns a featurized dataframe of rotational features and number of steps per window sizes
     """    
     accel_ts    = query.get_sensor_ts_from_filepath(filepath = filepath, 
-                                        sensor = "userAcceleration")
+                                        sensor = "userAcceleration",
+                                        version = version)
     rotation_ts = query.get_sensor_ts_from_filepath(filepath = filepath, 
-                                        sensor = "rotationRate")
+                                        sensor = "rotationRate",
+                                        version = version)
     
     # return errors # 
     if not isinstance(accel_ts, pd.DataFrame):
@@ -331,22 +510,35 @@ def gait_processor_pipeline(filepath, orientation):
     mean_arr_freeze_occ_per_secs = []
     mean_arr_speed_of_gait = []
     walking_seqs = separate_array_sequence(np.where(data["aucXt"]<2)[0])
+
+    ## low-pass filter the walking orientation once, every walking sequence reuses its slice
+    filtered_arr = butter_lowpass_filter(data[orientation].values,
+                                        sample_rate = 100,
+                                        cutoff = 5,
+                                        order = 4)
     for seqs in walking_seqs:
         data_seqs = data.loc[seqs[0]:seqs[-1]].set_index("time")
+        filtered_seqs = filtered_arr[seqs[0]:seqs[-1] + 1]
         no_of_steps_per_secs_wchunk = calculate_number_of_steps_per_window(data = data_seqs, 
-                                                                           orientation = orientation)
+                                                                           orientation = orientation,
+                                                                           filtered = filtered_seqs)
         mean_arr_wchunk.append(no_of_steps_per_secs_wchunk)
         duration = (data_seqs["td"].iloc[-1] - data_seqs["td"].iloc[0])
+
+        ## pdkit heel_strikes used to demean this column in place,
+        ## the remaining pdkit features below are computed on the demeaned signal
+        seqs_mean = data_seqs[orientation].mean()
+        data_seqs[orientation] = data_seqs[orientation] - seqs_mean
+        no_of_steps_per_secs_no_wchunk = heel_strikes_on_filtered(data_seqs[orientation].values,
+                                                                  filtered_seqs - seqs_mean,
+                                                                  sample_rate = 100,
+                                                                  duration = duration)
         
         ## fixed constants
         gp = pdkit.GaitProcessor(duration = duration,
                                 cutoff_frequency = 5,
                                 filter_order = 4,
                                 delta = 0.5)  
-        try:
-            no_of_steps_per_secs_no_wchunk = len(gp.heel_strikes(data_seqs[orientation])[0])/duration
-        except:
-            no_of_steps_per_secs_no_wchunk = 0
 
         """added all pdkit features"""
         ###### TODO: fix freeze occurences before running the whole data pipeline  #####
@@ -416,16 +608,43 @@ def gait_processor_pipeline(filepath, orientation):
         feature_dict["rotation.max_duration"]  = 0
     return feature_dict
 
-def pdkit_gait_featurize_wrapper(data):
+@memory.cache
+def cached_gait_processor_pipeline(filepath, mtime, orientation, version, pipeline_version):
+    """
+    Function to run the gait processor pipeline through the disk cache,
+    the file modification time and the pipeline version are part of the cache key
+    so changed files and changed feature code are reprocessed
+    """
+    return gait_processor_pipeline(filepath, orientation, version)
+
+
+def cached_pipeline(filepath, orientation, version = None):
+    """
+    Function to featurize a filepath using the disk cache when the file exists
+    parameter:
+        `filepath`   : string of pathfile
+        `orientation`: orientation of featurized data
+        `version`    : table version of the file, detected from the json layout if not given
+    
+    returns the output of gait_processor_pipeline
+    """
+    if not (isinstance(filepath, str) and os.path.isfile(filepath)):
+        return gait_processor_pipeline(filepath, orientation, version)
+    return cached_gait_processor_pipeline(filepath, os.path.getmtime(filepath), orientation, version, PIPELINE_VERSION)
+
+
+def pdkit_gait_featurize_wrapper(data, version = None):
     """
     wrapper function for multiprocessing jobs
     parameter:
-    `data`: takes in pd.DataFrame
+    `data`    : takes in pd.DataFrame
+    `version` : table version of the filepaths, detected from the json layout if not given
     returns a json file featurized data
     """
-    data["gait.pdkit_features"] = data["walk_motion.json_pathfile"].apply(gait_processor_pipeline, orientation = "y")
+    data["gait.pdkit_features"] = data["walk_motion.json_pathfile"].apply(cached_pipeline, orientation = "y", version = version)
     return data
 
-def rotation_featurize_wrapper(data):
-    data["rotational.gait_features"] = data["walk_motion.json_pathfile"].apply(compute_rotational_features, orientation = "y")
+def rotation_featurize_wrapper(data, version = None):
+    data["rotational.gait_features"] = data["walk_motion.json_pathfile"].apply(compute_rotational_features, 
+                                                                                orientation = "y", version = version)
     return data
@@ -6,20 +6,22 @@ import numpy as np
 import pdkit
 from pdkit.gait_time_series import GaitTimeSeries
 from pdkit.gait_processor import GaitProcessor
-from query_utils import get_sensor_ts, normalize_dict_features
+from utils.query_utils import get_sensor_ts_from_filepath, normalize_dict_to_column_features
 
 
-def pdkit_pipeline(filepath, var):
+def pdkit_pipeline(filepath, var, version = None):
     """
     Function to run pdkit package, it captures the duration of longitudinal data and the longitudinal data itself
     measure gait features like number of steps, symmetry measurement, regularity and freeze occurences
     parameter: filepath = filepath in .synapseCache
                var = which coordinate orientation to run pdkit pipeline on
+               version = table version of the file, detected from the json layout if not given
     returns dictionary of pdkit gait features
     """
     ### Process data to be usable by pdkit ###
-    data = get_sensor_ts(filepath = filepath, 
-                                sensor = "userAcceleration")
+    data = get_sensor_ts_from_filepath(filepath = filepath, 
+                                sensor = "userAcceleration",
+                                version = version)
     ### parse through gait processor to retrieve resampled signal
     try:
         ### if filepath is empty or have no accelerometer data ###
@@ -73,13 +75,13 @@ def pdkit_pipeline(filepath, var):
     return feature_dict
 
 
-def pdkit_featurize(data):
+def pdkit_featurize(data, version = None):
     """
     Function to featurize the filepath data with pdkit features,
     loops through xyz and AA(resultant) signal coordinate orientation
     and run pdkit package on each data in given coordinate orientations
     
-    parameter: filepath dataframe
+    parameter: filepath dataframe, table version of the filepaths
     returns: featurized data
     """
     for coord in ["x", "y", "z", "AA"]:
@@ -87,7 +89,7 @@ def pdkit_featurize(data):
                                                     and ("balance" not in _)
                                                     and ("rest" not in _)
                                                     and ("coord" not in _)]:
-            data["{}_features_{}".format(feature[:-8], coord)] = data[feature].apply(pdkit_pipeline, var = coord)
+            data["{}_features_{}".format(feature[:-8], coord)] = data[feature].apply(pdkit_pipeline, var = coord, version = version)
     return data
 
 
@@ -98,5 +100,5 @@ def normalize_pdkit_features(data):
     returns a normalized dataframe given a dictionary inside columns
     """
     for feature in [feat for feat in data.columns if "features" in feat]:
-        data = normalize_dict_features(data, feature)
+        data = normalize_dict_to_column_features(data, [feature])
     return data
\ No newline at end of file
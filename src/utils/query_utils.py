@@ -1,6 +1,7 @@
 import sys
-import json 
+import orjson
 import os
+import mmap
 import ast
 import pandas as pd
 import numpy as np
@@ -8,6 +9,9 @@ import synapseclient as sc
 from synapseclient import (Entity, Project, Folder, File, Link, Activity)
 import multiprocessing as mp
 from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import datetime
 
 
 def get_walking_synapse_table(syn, 
@@ -15,31 +19,43 @@ def get_walking_synapse_table(syn,
                             version, 
                             healthCodes = None, 
                             recordIds = None, 
-                            retrieveAll = False):
+                            retrieveAll = False,
+                            batch_size = 500,
+                            no_of_threads = 4):
     """
     Query synapse walking table entity 
     parameters:  
-    `syn`         : synapse object,             
-    `table_id`    : id of table entity,
-    `version`     : version number (args (string) = ["MPOWER_V1", "MPOWER_V2", "MS_ACTIVE", "PASSIVE"])
-    `healthcodes` : list or array of healthcodes
-    `recordIDs`   : list or of recordIds
+    `syn`           : synapse object,             
+    `table_id`      : id of table entity,
+    `version`       : version number (args (string) = ["MPOWER_V1", "MPOWER_V2", "MS_ACTIVE", "PASSIVE"])
+    `healthcodes`   : list or array of healthcodes
+    `recordIDs`     : list or of recordIds
+    `batch_size`    : number of healthcodes or recordIds per query
+    `no_of_threads` : number of batched queries sent to synapse at the same time
     
     returns: a dataframe of recordIds and their respective metadata, alongside their filehandleids and filepaths
-             empty filepath will be annotated as "#ERROR" on the dataframe
+             empty filepath are left as NaN, has_file marks records with at least one downloaded file
     """
     print("Querying %s Data" %version)
 
     if not retrieveAll:
         if not isinstance(recordIds, type(None)):
-            recordId_subset = "({})".format([i for i in recordIds]).replace("[", "").replace("]", "")
-            query = syn.tableQuery("select * from {} WHERE recordId in {}".format(table_id, recordId_subset))
+            subset_column, subset = "recordId", list(recordIds)
         else:
-            healthCode_subset = "({})".format([i for i in healthCodes]).replace("[", "").replace("]", "")
-            query = syn.tableQuery("select * from {} WHERE healthCode in {}".format(table_id, healthCode_subset))
+            subset_column, subset = "healthCode", list(healthCodes)
+        ## query in batches instead of a single huge WHERE clause ##
+        batches = [subset[i:i + batch_size] for i in range(0, max(len(subset), 1), batch_size)]
+        statements = ["select * from {} WHERE {} in ({})".format(table_id, subset_column, 
+                                                                ", ".join("'{}'".format(i) for i in batch)) 
+                      for batch in batches]
     else:
-        query = syn.tableQuery("select * from {}".format(table_id))
-    data = query.asDataFrame()
+        statements = ["select * from {}".format(table_id)]
+    
+    ## synapse queries are network bound, send them concurrently ##
+    with ThreadPoolExecutor(max_workers = no_of_threads) as executor:
+        queries = list(executor.map(syn.tableQuery, statements))
+    query_data = [query.asDataFrame() for query in queries]
+    data = pd.concat(query_data, copy = False)
     
     ## unique table identifier in mpowerV1 and EMS synapse table
     if (version == "MPOWER_V1") or (version == "MS_ACTIVE"):
@@ -55,58 +71,135 @@ def get_walking_synapse_table(syn,
     
     ## download columns that contains walking data based on the logical condition
     print(column_list)
-    file_map = syn.downloadTableColumns(query, column_list)
-    dict_ = {}
-    dict_["file_handle_id"] = []
-    dict_["file_path"] = []
-    for k, v in file_map.items():
-        dict_["file_handle_id"].append(k)
-        dict_["file_path"].append(v)
-    filepath_data = pd.DataFrame(dict_)
+    file_map = download_table_columns(syn, queries, query_data, column_list)
     data = data[["recordId", "healthCode", 
                 "appVersion", "phoneInfo", 
                 "createdOn"] + column_list]
-    filepath_data["file_handle_id"] = filepath_data["file_handle_id"].astype(float)
     
     ### Join the filehandles with each acceleration files ###
+    file_path_lookup = pd.Series(list(file_map.values()), 
+                                index = np.fromiter(file_map.keys(), dtype = np.float64, count = len(file_map)))
     for feat in column_list:
-        data[feat] = data[feat].astype(float)
-        data = pd.merge(data, filepath_data, 
-                        left_on = feat, 
-                        right_on = "file_handle_id", 
-                        how = "left")
-        data = data.rename(columns = {feat: "{}_path_id".format(feat), 
-                                    "file_path": "{}_pathfile".format(feat)})\
-                                        .drop(["file_handle_id"], axis = 1)
-    ## Empty Filepaths on synapseTable ##
-    data = data.fillna("#ERROR") 
-    cols = [feat for feat in data.columns if "path_id" not in feat]
-    return data[cols]
-
-
-def get_sensor_ts_from_filepath(filepath, sensor): 
+        data["{}_pathfile".format(feat)] = data[feat].astype(float).map(file_path_lookup)
+    data = data.drop(column_list, axis = 1).reset_index(drop = True)
+    
+    ## Empty Filepaths on synapseTable are kept as NaN ##
+    data["has_file"] = data[["{}_pathfile".format(feat) for feat in column_list]].notnull().any(axis = 1)
+    
+    ## low cardinality metadata are stored as categories ##
+    for feat in ["appVersion", "phoneInfo"]:
+        data[feat] = data[feat].astype("category")
+    return data
+
+
+def download_table_columns(syn, queries, query_data, column_list, 
+                            cache_path = os.path.join(os.path.expanduser("~"), ".cache", "mpower", "file_handle_paths.parquet")):
+    """
+    Function to download the file columns of table queries, 
+    file handles downloaded in previous runs are kept in a parquet cache 
+    and queries whose files are all still available locally skip synapse entirely
+    parameters:
+    `syn`         : synapse object
+    `queries`     : list of synapse table query results
+    `query_data`  : list of the dataframes of each query result
+    `column_list` : list of file handle columns to download
+    `cache_path`  : path to the parquet cache of file_handle_id, local_path and mtime
+    
+    returns: dictionary of file handle id to local filepath
+    """
+    cached_files = {}
+    if os.path.exists(cache_path):
+        cache = pd.read_parquet(cache_path)
+        cached_files = dict(zip(cache["file_handle_id"], zip(cache["local_path"], cache["mtime"])))
+    
+    file_map = {}
+    downloaded_files = {}
+    for query, data in zip(queries, query_data):
+        handles = pd.to_numeric(pd.Series(data[column_list].values.ravel()), errors = "coerce").dropna()
+        handles = ["%d" % handle for handle in handles.unique()]
+        ## only the files of this query are checked, removed or changed files are downloaded again ##
+        if all((handle in cached_files) 
+                and os.path.isfile(cached_files[handle][0]) 
+                and (os.path.getmtime(cached_files[handle][0]) == cached_files[handle][1]) 
+                for handle in handles):
+            file_map.update({handle: cached_files[handle][0] for handle in handles})
+        else:
+            downloaded_files.update(syn.downloadTableColumns(query, column_list))
+    file_map.update(downloaded_files)
+    
+    ## the cache is only rewritten when files were downloaded, dropping entries whose files are gone ##
+    if len(downloaded_files) > 0:
+        cached_files.update({handle: (path, os.path.getmtime(path)) for handle, path in downloaded_files.items()})
+        cached_files = {handle: entry for handle, entry in cached_files.items() if os.path.isfile(entry[0])}
+        os.makedirs(os.path.dirname(cache_path), exist_ok = True)
+        pd.DataFrame({"file_handle_id": list(cached_files.keys()), 
+                      "local_path": [entry[0] for entry in cached_files.values()], 
+                      "mtime": [entry[1] for entry in cached_files.values()]}).to_parquet(cache_path)
+    return file_map
+
+
+def parse_mpower_v1_sensor_data(data, sensor):
+    """
+    Function to parse mpowerV1 (and elevateMS) json records, 
+    where each sensor is a column of x, y, z dictionaries
+    parameters : 
+    `data`   : pandas dataframe of the json records
+    `sensor` : the sensor type
+    returns a cleaned sensor dataframe
+    """
+    ## unpack the x, y, z dictionaries in a single pass ##
+    xyz = pd.DataFrame(data[sensor].tolist(), index = data.index)[["x", "y", "z"]]
+    data = data[["timestamp"]].join(xyz)
+    return clean_accelerometer_data(data)
+
+
+def parse_mpower_v2_sensor_data(data, sensor):
+    """
+    Function to parse mpowerV2 (and passive) json records, 
+    where each record is a single sensorType reading with x, y, z keys
+    parameters : 
+    `data`   : pandas dataframe of the json records
+    `sensor` : the sensor type
+    returns a cleaned sensor dataframe, or "#ERROR" if the sensor cannot be cleaned
+    """
+    try:
+        data = data.loc[data["sensorType"] == sensor, ["timestamp", "x", "y", "z"]]
+        data = clean_accelerometer_data(data)
+    except:
+        return "#ERROR"
+    return data
+
+
+## json layout parser of each table version ##
+SENSOR_DATA_PARSERS = {"MPOWER_V1"  : parse_mpower_v1_sensor_data,
+                       "MS_ACTIVE"  : parse_mpower_v1_sensor_data,
+                       "MPOWER_V2"  : parse_mpower_v2_sensor_data,
+                       "PASSIVE"    : parse_mpower_v2_sensor_data,
+                       "MPOWER_PASSIVE" : parse_mpower_v2_sensor_data}
+
+
+def get_sensor_ts_from_filepath(filepath, sensor, version = None): 
     """
     Function to get accelerometer data given a filepath,
     will adjust to different table entity versions accordingly by 
     extracting specific keys in json pattern. 
-    Empty filepaths will be annotated with "#ERROR"
+    Empty filepaths (NaN) and empty or unreadable files will return "#ERROR"
 
     parameters : 
     `filepath` : string of filepath
     `sensor`   : the sensor type (userAcceleration, 
                 acceleration with gravity, 
                 gyroscope etc)
+    `version`  : table version of the file (key of SENSOR_DATA_PARSERS), 
+                 detected from the json layout if not given
 
     return a tidied version of the dataframe that contains a time-index dataframe (timestamp), 
     time differences (td), (x, y, z, AA) user acceleration (non-g)
     """
 
-    ## if empty filepaths return it back
-    if not isinstance(filepath, str):
-        raise Exception("Please insert a string pathfile to .SynapseCache reference")
-    
-    if filepath == "#ERROR":
-        return filepath 
+    ## empty filepaths (NaN, or "#ERROR" in tables stored with the previous annotation) ##
+    if not isinstance(filepath, str) or filepath == "#ERROR":
+        return "#ERROR"
 
     ## open filepath
     data = open_filepath(filepath)
@@ -115,24 +208,13 @@ def get_sensor_ts_from_filepath(filepath, sensor):
     if data.shape[0] == 0 or data.empty: 
         return "#ERROR"
     
-    ## get data from mpowerV2
-    if ("sensorType" in data.columns):
-        try:
-            data = data[data["sensorType"] == sensor]
-            data = clean_accelerometer_data(data)
-        except:
-            return "#ERROR"
-        return data[["td","x", "y", "z", "AA"]]
-        
-    ## get data from mpowerV1
-    else:
-        data = data[["timestamp", sensor]]
-        data["x"] = data[sensor].apply(lambda x: x["x"])
-        data["y"] = data[sensor].apply(lambda x: x["y"])
-        data["z"] = data[sensor].apply(lambda x: x["z"])
-        data = data.drop([sensor], axis = 1)
-        data = clean_accelerometer_data(data)
-        return data[["td","x", "y", "z", "AA"]]
+    ## mpowerV2 records carry their sensorType, mpowerV1 records are keyed by sensor ##
+    if version is None:
+        version = "MPOWER_V2" if "sensorType" in data.columns else "MPOWER_V1"
+    data = SENSOR_DATA_PARSERS[version](data, sensor)
+    if not isinstance(data, pd.DataFrame):
+        return data
+    return data[["td","x", "y", "z", "AA"]]
     
 
 def clean_accelerometer_data(data):
@@ -141,21 +223,24 @@ def clean_accelerometer_data(data):
     parameter: 
     `data`: pandas dataframe of time series
     returns index (datetimeindex), td (float64), 
-            x (float64), y (float64), z (float64),
-            AA (float64) dataframe    
+            x (float32), y (float32), z (float32),
+            AA (float32) dataframe    
     """
     data = data.dropna(subset = ["x", "y", "z"])
+    ## float32 is plenty for sensor readings and halves the memory of x, y, z and AA ##
+    xyz = np.ascontiguousarray(data[["x", "y", "z"]].values, dtype = np.float32)
+    data["x"] = xyz[:, 0]
+    data["y"] = xyz[:, 1]
+    data["z"] = xyz[:, 2]
     date_series = pd.to_datetime(data["timestamp"], unit = "s")
-    data["td"] = date_series - date_series.iloc[0]
-    data["td"] = data["td"].apply(lambda x: x.total_seconds())
-    data["time"] = data["td"]
-    data = data.set_index("time")
-    data.index = pd.to_datetime(data.index, unit = "s")
-    data["AA"] = np.sqrt(data["x"]**2 + data["y"]**2 + data["z"]**2)
+    data["td"] = (date_series - date_series.iloc[0]).dt.total_seconds()
+    data.index = pd.to_datetime(data["td"].values, unit = "s")
+    data.index.name = "time"
+    data["AA"] = np.sqrt(np.einsum("ij,ij->i", xyz, xyz))
     data = data.sort_index()
     
     ## check if datetime index is sorted ##
-    if all(data.index[:-1] <= data.index[1:]):
+    if data.index.is_monotonic_increasing:
         return data 
     else:
         sys.exit('Time Series File is not Sorted')
@@ -168,12 +253,28 @@ def open_filepath(filepath):
     `filepath`: filepath to designated synapsecache
     return: pandas dataframe of the respective filepath
     """
-    with open(filepath) as f:
-        json_data = f.read()
-        data = pd.DataFrame(json.loads(json_data))
+    ## parse straight from the memory mapped file instead of copying it into a buffer first ##
+    with open(filepath, "rb") as f, \
+        mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mapped_file, \
+            memoryview(mapped_file) as json_data:
+        data = pd.DataFrame(orjson.loads(json_data))
     return data
 
 
+@lru_cache(maxsize = None)
+def query_distinct_healthcodes(syn, table_id):
+    """
+    Function to query distinct healthCodes of a table, 
+    memoized per synapse session and table as the result rarely changes within a session
+    parameter:  
+    `syn`      : syn object,            
+    `table_id` : table that user want to query from,    
+    returns tuple of healthcodes
+    """
+    return tuple(syn.tableQuery("select distinct(healthCode) as healthCode from {}".format(table_id))
+                    .asDataFrame()["healthCode"])
+
+
 def get_all_healthcodes_from_synTable(syn, table_id):
     """
     Function to get healthCodes in python list format
@@ -182,8 +283,7 @@ def get_all_healthcodes_from_synTable(syn, table_id):
     `table_id` : table that user want to query from,    
     returns list of healthcodes
     """
-    healthcode_list = list(syn.tableQuery("select distinct(healthCode) as healthCode from {}".format(table_id))
-                                   .asDataFrame()["healthCode"])
+    healthcode_list = list(query_distinct_healthcodes(syn, table_id))
     return healthcode_list
     
     
@@ -206,6 +306,8 @@ def save_data_to_synapse(syn,
     `used_script`      = git repo url that produces this data (if available)
     `source_table_id`  = list of source of where this data is produced (if available) 
     `remove`           = remove data after saving, generally used for csv data 
+    
+    dataframes are written as parquet when output_filename ends with .parquet, otherwise as csv
 
     returns stored file entity in Synapse Database
     """
@@ -214,7 +316,10 @@ def save_data_to_synapse(syn,
         
     ## save the script to synapse ##
     if isinstance(data, pd.DataFrame):
-        data = data.to_csv(path_to_output_filename)
+        if output_filename.endswith(".parquet"):
+            data = data.to_parquet(path_to_output_filename, compression = "zstd")
+        else:
+            data = data.to_csv(path_to_output_filename)
     
     ## create new file instance and set up the provenance
     new_file = File(path = path_to_output_filename, parentId = data_parent_id)
@@ -228,6 +333,7 @@ def save_data_to_synapse(syn,
         
     ## store to synapse ## 
     new_file = syn.store(new_file, activity = act)           
+    get_children_index.cache_clear()
         
     ## remove the file ##
     if remove:
@@ -244,11 +350,12 @@ def normalize_dict_to_column_features(data, features):
     returns a normalized dataframe with column containing dictionary normalized
     """
     for feature in features:
-        normalized_data = data[feature].map(lambda x: x if isinstance(x, dict) else "#ERROR") \
-                                    .apply(pd.Series) \
-                                    .fillna("#ERROR") \
+        ## non-dictionary rows are normalized as empty dictionaries (NaN columns), 
+        ## nested dictionaries are kept as values ##
+        normalized_data = pd.DataFrame(data[feature].map(lambda x: x if isinstance(x, dict) else {}).tolist(), 
+                                       index = data.index) \
                                     .add_prefix('{}.'.format(feature))
-        data = pd.concat([data, normalized_data], axis = 1).drop([feature, "%s.0"%feature], axis = 1)
+        data = pd.concat([data.drop([feature], axis = 1), normalized_data], axis = 1)
     return data
 
 def normalize_list_dicts_to_dataframe_rows(data, features):
@@ -260,11 +367,13 @@ def normalize_list_dicts_to_dataframe_rows(data, features):
     return a normalized dataframe with new rows from normalize list of dicts
     """
     for feature in features:
-        data = (pd.concat({i: pd.DataFrame(x) for i, x in data[feature].items()})
-                 .reset_index(level=1, drop=True)
-                 .join(data).drop([feature], axis = 1)
-                 .reset_index(drop = True)
-                )
+        exploded = data.explode(feature)
+        ## empty lists explode into NaN rows, these have nothing to normalize ##
+        exploded = exploded[exploded[feature].notnull()]
+        normalized_data = pd.json_normalize(exploded[feature].tolist(), max_level = 0)
+        normalized_data.index = exploded.index
+        data = pd.concat([normalized_data, exploded.drop([feature], axis = 1)], axis = 1)\
+                    .reset_index(drop = True)
     return data
 
  
@@ -275,16 +384,15 @@ def fix_column_name(data):
     `data`: pandas DataFrame
     returns a dataframe with fixed column feature naming conventions
     """
-    for feature in filter(lambda x: "feature" in x, data.columns): 
-        data  = data.rename({feature: "%s"\
-                            %(feature.split("features_")[1])}, axis = 1)
+    mapping = {feature: feature.split("features_")[1] for feature in data.columns if "features_" in feature}
+    data = data.rename(mapping, axis = 1)
     return data
 
 
 
 def get_file_entity(syn, synid):
     """
-    Get data (csv,tsv) file entity and turn it into pandas csv
+    Get data (parquet,csv,tsv) file entity and turn it into pandas dataframe
     returns pandas dataframe 
     parameters:
     `syn`: a syn object
@@ -292,6 +400,8 @@ def get_file_entity(syn, synid):
     returns pandas dataframe
     """
     entity = syn.get(synid)
+    if entity["name"].endswith(".parquet"):
+        return pd.read_parquet(entity["path"])
     if (".tsv" in entity["name"]):
         separator = "\t"
     else:
@@ -311,15 +421,27 @@ def parallel_func_apply(df, func, no_of_processors, chunksize):
     `chunksize`        = number of partition 
     return: featurized dataframes
     """
-    df_split = np.array_split(df, chunksize)
+    ## row group views are generated lazily instead of copying the whole dataframe up front ##
+    step = max(1, int(np.ceil(len(df) / chunksize)))
+    df_split = (df.iloc[i:i + step] for i in range(0, max(len(df), 1), step))
     print("Currently running on {} processors".format(no_of_processors))
-    pool = Pool(no_of_processors)
-    map_values = pool.map(func, df_split)
-    df = pd.concat(map_values)
-    pool.close()
-    pool.join()
+    with Pool(no_of_processors) as pool:
+        map_values = list(pool.imap(func, df_split))
+    df = pd.concat(map_values, copy = False)
     return df
 
+@lru_cache(maxsize = 128)
+def get_children_index(syn, parent_id):
+    """
+    Function to index the children of a synapse folder by name, 
+    memoized per folder and cleared whenever save_data_to_synapse stores a new file
+    parameter:
+    `syn`       = syn object
+    `parent_id` = the parent folder
+    returns dictionary of children name to synapse id
+    """
+    return {children["name"]: children["id"] for children in syn.getChildren(parent = parent_id)}
+
 def check_children(syn, data_parent_id, filename):
     """
     Function to check if file is already available
@@ -331,16 +453,27 @@ def check_children(syn, data_parent_id, filename):
     returns previously stored dataframe that has the same filename
     """
     prev_stored_data = pd.DataFrame()
-    for children in syn.getChildren(parent = data_parent_id):
-            if children["name"] == filename:
-                prev_stored_data_id = children["id"]
-                prev_stored_data = get_file_entity(syn, prev_stored_data_id)
+    prev_stored_data_id = get_children_index(syn, data_parent_id).get(filename)
+    if prev_stored_data_id is not None:
+        prev_stored_data = get_file_entity(syn, prev_stored_data_id)
     return prev_stored_data
 
 
-def generate_demographic_info(syn, data):
+def get_demographic_data(syn, cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "mpower")):
+    """
+    Function to query and clean mpower version 1 and 2 demographics, 
+    the result is cached on disk for the day so reruns skip the synapse queries
+    parameter:
+    `syn`       : syn object
+    `cache_dir` : directory of the demographic cache
+    returns a dataframe of healthCode, age, gender and PD
+    """
     DEMO_DATA_V1 = "syn10371840"
     DEMO_DATA_V2 = "syn15673379"
+    cache_path = os.path.join(cache_dir, "demographics_%s_%s_%s.parquet" \
+                                %(DEMO_DATA_V1, DEMO_DATA_V2, datetime.date.today().isoformat()))
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
     
     ## demographics on mpower version 1 ##
     demo_data_v1 = syn.tableQuery("SELECT age, healthCode, \
@@ -351,7 +484,7 @@ def generate_demographic_info(syn, data):
     demo_data_v1 = demo_data_v1.dropna(subset = ["PD"], thresh = 1)                     ## drop if no diagnosis
     demo_data_v1["PD"] = demo_data_v1["PD"].map({True :1.0, False:0.0})                 ## encode as numeric binary
     demo_data_v1["age"] = demo_data_v1["age"].apply(lambda x: float(x))  
-    demo_data_v1["gender"] = demo_data_v1["gender"].apply(lambda x: x.lower())
+    demo_data_v1["gender"] = demo_data_v1["gender"].str.lower().astype("category")
     
     ## demographics on mpower version 2 ##
     demo_data_v2 = syn.tableQuery("SELECT birthYear, createdOn, healthCode, \
@@ -360,7 +493,7 @@ def generate_demographic_info(syn, data):
     demo_data_v2        = demo_data_v2[(demo_data_v2["gender"] == "male") | (demo_data_v2["gender"] == "female")]
     demo_data_v2        = demo_data_v2[demo_data_v2["PD"] != "no_answer"]               
     demo_data_v2["PD"]  = demo_data_v2["PD"].map({"parkinsons":1, "control":0})
-    demo_data_v2["birthYear"] = demo_data_v2[demo_data_v2["birthYear"].apply(lambda x: True if x>=0 else False)]
+    demo_data_v2        = demo_data_v2[demo_data_v2["birthYear"] >= 0]
     demo_data_v2["age"] = pd.to_datetime(demo_data_v2["createdOn"], unit = "ms").dt.year - demo_data_v2["birthYear"] 
     
     
@@ -369,19 +502,27 @@ def generate_demographic_info(syn, data):
     ## check integrity of data ##
     
     ## check if multiple input of PD ##
-    demo_data = pd.merge(demo_data, 
-         (demo_data.groupby("healthCode")\
-          .nunique()["PD"] >= 2)\
-            .reset_index()\
-                .rename({"PD":"has_double_PD_entry"}, axis = 1),
-         on = "healthCode", 
-         how = "left")
-    demo_data = demo_data[demo_data["has_double_PD_entry"] == False]
+    demo_data = demo_data[demo_data.groupby("healthCode")["PD"].transform("nunique") < 2]
     
     ## realistic age range ##
     demo_data = demo_data[(demo_data["age"] <= 110) & (demo_data["age"] >= 10)]
-    demo_data = demo_data.drop(["birthYear","createdOn", "has_double_PD_entry"], axis = 1)  
+    demo_data = demo_data.drop(["birthYear","createdOn"], axis = 1)  
+    demo_data["gender"] = demo_data["gender"].astype("category")
     
+    os.makedirs(cache_dir, exist_ok = True)
+    demo_data.to_parquet(cache_path)
+    return demo_data
+
+
+def generate_demographic_info(syn, data):
+    """
+    Function to annotate data with the demographics of each healthCode
+    parameter:
+    `syn`  : syn object
+    `data` : pandas dataframe with healthCode column
+    returns dataframe joined with age, gender and PD
+    """
+    demo_data = get_demographic_data(syn)
     data = pd.merge(data, demo_data, how = "inner", on = "healthCode")
     return data
 
@@ -5,7 +5,7 @@ import scipy.fftpack
 import json
 import statsmodels as stats
 from sklearn.metrics import auc
-from utils.query_utils import get_acceleration_ts
+from utils.query_utils import get_sensor_ts_from_filepath
 
 def get_spectrum(signal):
     ## Number of samplepoints
@@ -43,11 +43,12 @@ def sfm_preprocessing(data, hz_start = 0, hz_end = 10, gamma_range = np.arange(0
     sfm_data = sfm(spec_data, hz_start, hz_end, gamma_range)
     return sfm_data
 
-def sfm_auc_pipeline(params, var):
+def sfm_auc_pipeline(params, var, version = None):
     ## process acceleration
     try:
-        data = get_sensor_ts(filepath = params, 
-                                    sensor =  "userAcceleration")
+        data = get_sensor_ts_from_filepath(filepath = params, 
+                                    sensor =  "userAcceleration",
+                                    version = version)
         # print(data)
     except:
         return "#ERROR"
@@ -61,10 +62,10 @@ def sfm_auc_pipeline(params, var):
     area = auc(data.gamma, data.sfm)
     return area
 
-def sfm_featurize(data):
+def sfm_featurize(data, version = None):
     for coord in ["x", "y", "z", "AA"]:
         for pathfile in [_ for _ in data.columns if ("pathfile" in _) 
                                                 and ("balance" in _ or "rest" in _ )]:
             print(pathfile)
-            data["sfm_auc_{}".format(coord)] = data[pathfile].apply(sfm_auc_pipeline, var = coord)
+            data["sfm_auc_{}".format(coord)] = data[pathfile].apply(sfm_auc_pipeline, var = coord, version = version)
     return data
\ No newline at end of file